@@ -4,17 +4,17 @@ import sys
 import os
 import subprocess
 import json
-import shutil
 import pathlib
-import tempfile
-import signal
 import time
+import functools
+import re
 from typing import Optional, Dict, Any
 HOME = pathlib.Path.home()
 APOLLO_DIR = HOME / ".apollo"
 APPS_DIR = APOLLO_DIR / "apps"
 CONF_DIR = APOLLO_DIR / "configs"
 LOG_DIR = APOLLO_DIR / "logs"
+LOG_DIR_STR = str(LOG_DIR)
 REPO_CACHE = APOLLO_DIR / "repo.json"
 VERSION = "2.1.0"
 
@@ -30,27 +30,189 @@ COLORS = {
     "BOLD": "\033[1m"
 }
 
+# ANSI-коды имеют смысл только на терминале: при выводе в пайп или
+# файл шлём чистый текст — меньше байтов и никакого мусора у потребителя
+_TTY = sys.stdout.isatty()
+if not _TTY:
+    COLORS = {key: "" for key in COLORS}
+
+# Кэш поиска бинарников: каждый shutil.which обходит весь $PATH.
+# shutil импортируется лениво, чтобы не платить за него на пути help
+@functools.lru_cache(maxsize=None)
+def _which(cmd: str) -> Optional[str]:
+    import shutil
+    return shutil.which(cmd)
+
+# Готовые шаблоны сообщений: цвет и уровень свёрнуты в константу,
+# на вызов остаётся один lookup + format
+_MSG_TEMPLATES = {
+    level: f"{COLORS[color]}[{level}] {{}}{COLORS['END']}"
+    for level, color in [
+        ("SUCCESS", "GREEN"),
+        ("INFO", "CYAN"),
+        ("WARNING", "YELLOW"),
+        ("ERROR", "RED"),
+        ("DEBUG", "MAGENTA")
+    ]
+}
+
 #утилиты
 def msg(level: str, text: str) -> None:
     """Вывод цветного сообщения"""
-    color_map = {
-        "SUCCESS": COLORS["GREEN"],
-        "INFO": COLORS["CYAN"],
-        "WARNING": COLORS["YELLOW"],
-        "ERROR": COLORS["RED"],
-        "DEBUG": COLORS["MAGENTA"]
-    }
-    color = color_map.get(level, COLORS["CYAN"])
-    print(f"{color}[{level}] {text}{COLORS['END']}")
+    template = _MSG_TEMPLATES.get(level)
+    if template is None:
+        template = f"{COLORS['CYAN']}[{level}] {{}}{COLORS['END']}"
+    print(template.format(text))
+
+def msg_many(pairs) -> None:
+    """Вывод нескольких сообщений одним write вместо print на каждое"""
+    lines = []
+    for level, text in pairs:
+        template = _MSG_TEMPLATES.get(level)
+        if template is None:
+            template = f"{COLORS['CYAN']}[{level}] {{}}{COLORS['END']}"
+        lines.append(template.format(text))
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def ensure_dirs() -> None:
     """Создание необходимых директорий"""
     for d in [APOLLO_DIR, APPS_DIR, CONF_DIR, LOG_DIR]:
         d.mkdir(parents=True, exist_ok=True)
 
+def _fast_copyfile(src: str, dst: str) -> str:
+    """Быстрое копирование файла: copy_file_range -> sendfile -> read/write 1 МиБ"""
+    try:
+        in_fd = os.open(src, os.O_RDONLY | getattr(os, "O_NOATIME", 0))
+    except OSError:
+        # O_NOATIME требует владения файлом
+        in_fd = os.open(src, os.O_RDONLY)
+    try:
+        out_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            size = os.fstat(in_fd).st_size
+            copied = 0
+            # reflink/серверное клонирование на btrfs/xfs/NFSv4.2
+            if hasattr(os, "copy_file_range"):
+                try:
+                    while copied < size:
+                        n = os.copy_file_range(in_fd, out_fd, size - copied)
+                        if n == 0:
+                            break
+                        copied += n
+                except OSError:
+                    # Не поддерживается на этой ФС — начинаем заново
+                    copied = 0
+                    os.lseek(in_fd, 0, os.SEEK_SET)
+                    os.lseek(out_fd, 0, os.SEEK_SET)
+                    os.ftruncate(out_fd, 0)
+            if copied < size:
+                try:
+                    while True:
+                        n = os.sendfile(out_fd, in_fd, None, 1 << 20)
+                        if n == 0:
+                            break
+                except OSError:
+                    # Последний вариант: обычный read/write с буфером 1 МиБ
+                    while True:
+                        chunk = os.read(in_fd, 1 << 20)
+                        if not chunk:
+                            break
+                        os.write(out_fd, chunk)
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+    # Метаданные переносим одним вызовом, без stat на каждый блок
+    import shutil
+    shutil.copystat(src, dst)
+    return dst
+
+def _ingest_bundle(src_dir: str, dest_dir: pathlib.Path) -> Optional[pathlib.Path]:
+    """Упаковка .app-бандла в один tar.zst вместо пофайлового copytree"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    import tarfile
+
+    base = pathlib.Path(src_dir).name
+    archive = dest_dir / f"{base}.tar.zst"
+    cctx = zstandard.ZstdCompressor(level=3)
+
+    with open(archive, "wb") as raw:
+        with cctx.stream_writer(raw) as zst:
+            with tarfile.open(fileobj=zst, mode="w|") as tar:
+                # Обходим дерево через os.scandir вместо rglob —
+                # вдвое меньше syscalls на тысячах мелких файлов
+                stack = [(src_dir, base)]
+                while stack:
+                    cur_dir, arc_dir = stack.pop()
+                    with os.scandir(cur_dir) as it:
+                        for entry in it:
+                            arcname = f"{arc_dir}/{entry.name}"
+                            tar.add(entry.path, arcname=arcname, recursive=False)
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append((entry.path, arcname))
+
+    return archive
+
+def _extract_bundle(archive: str) -> Optional[str]:
+    """Распаковка tar.zst-бандла в кэш (один раз на версию архива)"""
+    try:
+        import zstandard
+    except ImportError:
+        msg("ERROR", "Для распаковки бандла нужен модуль zstandard")
+        msg("INFO", "Установите: pip install zstandard")
+        return None
+    import shutil
+    import tarfile
+    import tempfile
+
+    # Кэш под ~/.apollo, ключ — имя и mtime архива: повторный запуск
+    # той же версии идёт из кэша без распаковки, а /tmp не засоряется
+    # гигабайтами на каждый open
+    arc_path = pathlib.Path(archive)
+    app_name = arc_path.name[:-len(".tar.zst")]
+    key = f"{app_name}.{arc_path.stat().st_mtime_ns:x}"
+    cache_root = APOLLO_DIR / "cache"
+    cache_root.mkdir(parents=True, exist_ok=True)
+    dest = cache_root / key
+
+    app_dir = dest / app_name
+    if app_dir.is_dir():
+        return str(app_dir)
+
+    # Устаревшие версии того же бандла (другой mtime) больше не нужны
+    prefix = f"{app_name}."
+    with os.scandir(cache_root) as it:
+        for entry in it:
+            if (entry.name.startswith(prefix) and entry.name != key
+                    and entry.is_dir(follow_symlinks=False)):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    # Распаковываем рядом и атомарно переименовываем: параллельный
+    # запуск не увидит полураспакованного каталога
+    tmp = tempfile.mkdtemp(prefix=f".{key}.", dir=cache_root)
+    dctx = zstandard.ZstdDecompressor()
+    with open(archive, "rb") as raw:
+        with dctx.stream_reader(raw) as zst:
+            with tarfile.open(fileobj=zst, mode="r|") as tar:
+                # filter отрезает member-пути, вылезающие из каталога
+                # распаковки, и глушит DeprecationWarning на 3.12+
+                tar.extractall(tmp, filter="tar")
+
+    try:
+        os.rename(tmp, dest)
+    except OSError:
+        # Конкурирующий запуск распаковал первым — наша копия лишняя
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    # Внутри архива лежит ровно один <name>.app
+    return str(app_dir)
+
 def check_dep(cmd: str, name: str) -> bool:
     """Проверка наличия зависимости"""
-    if shutil.which(cmd) is None:
+    if _which(cmd) is None:
         msg("ERROR", f"Зависимость '{name}' ({cmd}) не найдена.")
         msg("INFO", f"Установите её: sudo apt install {name.lower()}")
         return False
@@ -58,6 +220,15 @@ def check_dep(cmd: str, name: str) -> bool:
 
 def ensure_deps() -> bool:
     """Проверка всех зависимостей"""
+    # Сентинел: если зависимости проверялись менее суток назад — не
+    # обходим $PATH заново при каждом запуске
+    sentinel = APOLLO_DIR / ".deps_ok"
+    try:
+        if time.time() - sentinel.stat().st_mtime < 86400:
+            return True
+    except OSError:
+        pass
+
     deps = [
         ("lxc", "LXC/LXD"),
         ("wine", "Wine"),
@@ -77,25 +248,83 @@ def ensure_deps() -> bool:
         msg("INFO", "  sudo apt install lxd wine darling waydroid curl")
         msg("INFO", "  sudo lxd init --auto")
         msg("INFO", "  waydroid init -s GAPPS")
-    
+    else:
+        sentinel.touch()
+
     return all_ok
 
-#я заебался ПОДСИСТЕМА LXC 
-def subsystem_running() -> bool:
+#я заебался ПОДСИСТЕМА LXC
+def _wait_for_container_ready(name: str, timeout: float = 15.0) -> bool:
+    """Ожидание готовности контейнера вместо фиксированного sleep"""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while time.monotonic() < deadline:
+        # Дешёвая проба: exec true возвращает 0, как только контейнер жив
+        probe = subprocess.run(
+            ["lxc", "exec", name, "--", "true"],
+            capture_output=True
+        )
+        if probe.returncode == 0:
+            return True
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+    return False
+
+def _wait_for_container_network(name: str, timeout: float = 30.0) -> bool:
+    """Ожидание сети контейнера: exec оживает раньше, чем DHCP/DNS"""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while time.monotonic() < deadline:
+        # Колонка 4 в csv — IPv4-адреса контейнера
+        probe = subprocess.run(
+            ["lxc", "list", name, "--format=csv", "-c", "4"],
+            capture_output=True,
+            text=True
+        )
+        if probe.returncode == 0:
+            for line in probe.stdout.splitlines():
+                field = line.strip().strip('"')
+                if field and field[0].isdigit():
+                    return True
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+    return False
+
+# Кэш статуса контейнера: каждый опрос — это запуск Go-клиента lxc
+# (~100мс). Положительный ответ живёт дольше отрицательного, чтобы
+# поднимающийся контейнер замечался быстро
+_SUBSYS_TTL_UP = 2.0
+_SUBSYS_TTL_DOWN = 0.2
+_subsys_cache: Dict[str, Any] = {"value": None, "ts": 0.0}
+
+def subsystem_running(force: bool = False) -> bool:
     """Проверка работы LXC-контейнера Apollo"""
+    now = time.monotonic()
+    cached = _subsys_cache["value"]
+    if not force and cached is not None:
+        ttl = _SUBSYS_TTL_UP if cached else _SUBSYS_TTL_DOWN
+        if now - _subsys_cache["ts"] < ttl:
+            return cached
+
     try:
+        # csv с двумя колонками вместо полного JSON-дампа всех контейнеров
         result = subprocess.run(
-            ["lxc", "list", "apollo", "--format=json"],
+            ["lxc", "list", "apollo", "--format=csv", "-c", "ns"],
             capture_output=True,
             text=True,
             check=True
         )
-        containers = json.loads(result.stdout)
-        return any(container.get("name") == "apollo" 
-                  and container.get("status") == "Running" 
-                  for container in containers)
-    except (subprocess.CalledProcessError, json.JSONDecodeError):
-        return False
+        import csv
+        running = any(
+            len(row) >= 2 and row[0] == "apollo" and row[1] == "Running"
+            for row in csv.reader(result.stdout.splitlines()))
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        # lxc не установлен — контейнера точно нет
+        running = False
+
+    _subsys_cache["value"] = running
+    _subsys_cache["ts"] = now
+    return running
 
 def setup_subsystem() -> bool:
     """Настройка LXC-контейнера"""
@@ -114,31 +343,26 @@ def setup_subsystem() -> bool:
             "-c", "linux.kernel_modules=ip_tables,ip6_tables,nf_nat,xt_conntrack"
         ], check=True)
         
-        # Ждем запуска сети
-        time.sleep(5)
+        # Ждем запуска сети ровно столько, сколько нужно: apt ниже
+        # требует рабочий DHCP/DNS, одного живого exec недостаточно
+        if not _wait_for_container_network("apollo"):
+            msg("ERROR", "Контейнер не получил сеть за отведённое время")
+            return False
         
-        # Обновляем и устанавливаем софт
+        # Обновляем и устанавливаем софт одним exec вместо двух
         msg("INFO", "Установка Wine в контейнере...")
         subprocess.run([
             "lxc", "exec", "apollo", "--",
-            "apt", "update", "-y"
-        ], check=True)
-        
-        subprocess.run([
-            "lxc", "exec", "apollo", "--",
-            "apt", "install", "-y", "wine64", "wine32", "fonts-wine",
-            "xauth", "x11-apps", "dbus-x11", "pulseaudio"
-        ], check=True)
-        
-        # Настраиваем X11 forwarding
-        subprocess.run([
-            "lxc", "config", "set", "apollo",
-            "environment.DISPLAY", os.environ.get("DISPLAY", ":0")
+            "sh", "-c",
+            "apt update -y && apt install -y wine64 wine32 fonts-wine "
+            "xauth x11-apps dbus-x11 pulseaudio"
         ], check=True)
-        
+
+        # Настраиваем X11 forwarding: оба ключа одним вызовом lxc
         subprocess.run([
             "lxc", "config", "set", "apollo",
-            "environment.PULSE_SERVER", "unix:/home/ubuntu/pulse-native"
+            f"environment.DISPLAY={os.environ.get('DISPLAY', ':0')}",
+            "environment.PULSE_SERVER=unix:/home/ubuntu/pulse-native"
         ], check=True)
         
         msg("SUCCESS", "Контейнер Apollo настроен")
@@ -153,71 +377,137 @@ def start_subsystem() -> bool:
     if not subsystem_running():
         msg("INFO", "Запуск подсистемы Apollo...")
         
-        # Проверяем существование контейнера
+        # Проверяем существование контейнера (одна колонка, без JSON)
         result = subprocess.run(
-            ["lxc", "list", "apollo", "--format=json"],
+            ["lxc", "list", "apollo", "--format=csv", "-c", "n"],
             capture_output=True, text=True
         )
-        
-        containers = json.loads(result.stdout) if result.returncode == 0 else []
-        container_exists = any(c.get("name") == "apollo" for c in containers)
+
+        container_exists = result.returncode == 0 and any(
+            line.strip() == "apollo" for line in result.stdout.splitlines())
         
         if not container_exists:
             if not setup_subsystem():
                 return False
         else:
             subprocess.run(["lxc", "start", "apollo"], check=True)
-            time.sleep(3)
+            if not _wait_for_container_ready("apollo"):
+                msg("ERROR", "Контейнер не вышел в готовность за отведённое время")
+                return False
     
     msg("INFO", "Подсистема готова")
     return True
 
 # ОБНАРУЖЕНИЕ ТИПОВ виндузня
+_SUFFIX_MAP = {
+    ".exe": "exe",
+    ".msi": "exe",
+    ".apk": "apk",
+    ".dmg": "macos",
+    ".app": "macos",
+    ".pkg": "macos",
+    ".deb": "linux",
+    ".rpm": "linux",
+    ".sh": "script",
+    ".bash": "script",
+}
+
+_MAGIC_MAP = {
+    b"MZ": "exe",        # Windows PE
+    b"\x7fELF": "linux"  # Linux ELF
+}
+
 def detect_type(path: str) -> Optional[str]:
     """Определение типа приложения по расширению"""
     path_lower = path.lower()
-    
-    if path_lower.endswith((".exe", ".msi")):
-        return "exe"
-    elif path_lower.endswith(".apk"):
-        return "apk"
-    elif path_lower.endswith((".dmg", ".app", ".pkg")):
+
+    # Составной суффикс упакованных бандлов не ловится splitext-ом
+    if path_lower.endswith(".app.tar.zst"):
         return "macos"
-    elif path_lower.endswith((".deb", ".rpm")):
-        return "linux"
-    elif path_lower.endswith((".sh", ".bash")):
-        return "script"
-    
-    # Проверяем magic bytes для бинарников
+
+    app_type = _SUFFIX_MAP.get(os.path.splitext(path_lower)[1])
+    if app_type:
+        return app_type
+
+    # Проверяем magic bytes для бинарников: os.open/os.read без
+    # создания BufferedReader
     try:
-        with open(path, 'rb') as f:
-            header = f.read(4)
-            if header.startswith(b'MZ'):  # Windows PE
-                return "exe"
-            elif header.startswith(b'\x7fELF'):  # Linux ELF
-                return "linux"
-    except:
-        pass
-    
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            header = os.read(fd, 4)
+        finally:
+            os.close(fd)
+    except OSError:
+        return None
+
+    for magic, magic_type in _MAGIC_MAP.items():
+        if header.startswith(magic):
+            return magic_type
+
     return None
 
-#  ЗАПУСК ПРИЛОЖЕНИЙ 
+#  ЗАПУСК ПРИЛОЖЕНИЙ
+class _PidLog:
+    """Журнал PID запущенных приложений с одним кэшированным fd"""
+    _fd: Optional[int] = None
+
+    @classmethod
+    def record(cls, app_name: str, pid: int) -> None:
+        if cls._fd is None:
+            # O_APPEND гарантирует атомарность записей при
+            # параллельных запусках
+            cls._fd = os.open(
+                str(APOLLO_DIR / "running.pid"),
+                os.O_APPEND | os.O_WRONLY | os.O_CREAT,
+                0o644
+            )
+            import atexit
+            atexit.register(cls._close)
+        os.write(cls._fd, f"{app_name}:{pid}:{time.time_ns()}\n".encode())
+
+    @classmethod
+    def _close(cls) -> None:
+        if cls._fd is not None:
+            os.close(cls._fd)
+            cls._fd = None
+
 def run_exe(path: str, app_name: str, config: Dict[str, Any]) -> bool:
     """Запуск Windows приложения"""
     try:
         if not start_subsystem():
             return False
         
-        # Создаем уникальное имя файла
-        exe_name = f"{app_name}_{int(time.time())}.exe"
-        container_path = f"/root/{exe_name}"
-        
-        # Копируем файл в контейнер
-        msg("INFO", f"Копирование {path} в контейнер...")
-        subprocess.run([
-            "lxc", "file", "push", path,
-            f"apollo{container_path}"
-        ], check=True)
+        # Пробрасываем директорию с файлом в контейнер (bind mount):
+        # ни одного байта не копируется, в отличие от lxc file push
+        host_path = os.path.abspath(path)
+        safe_name = "".join(c if c.isalnum() else "_" for c in app_name)
+        device = f"apollo_{safe_name}"
+        mount_point = f"/mnt/{device}"
+        exe_name = os.path.basename(host_path)
+
+        msg("INFO", f"Монтирование {os.path.dirname(host_path)} в контейнер...")
+        # Старое устройство с тем же именем могло остаться от прошлого запуска
+        subprocess.run(
+            ["lxc", "config", "device", "remove", "apollo", device],
+            capture_output=True
+        )
+        mounted = subprocess.run([
+            "lxc", "config", "device", "add", "apollo", device, "disk",
+            f"source={os.path.dirname(host_path)}",
+            f"path={mount_point}",
+            "readonly=true"
+        ], capture_output=True).returncode == 0
+
+        if mounted:
+            container_path = f"{mount_point}/{exe_name}"
+        else:
+            # Запасной путь: копирование через API-сокет LXD
+            msg("INFO", f"Копирование {path} в контейнер...")
+            container_path = f"/root/{app_name}_{int(time.time())}.exe"
+            subprocess.run([
+                "lxc", "file", "push", path,
+                f"apollo{container_path}"
+            ], check=True)
         
         # Подготавливаем переменные окружения
         env_vars = []
@@ -247,9 +537,7 @@ def run_exe(path: str, app_name: str, config: Dict[str, Any]) -> bool:
         msg("INFO", f"Логи: {log_file}")
         
         # Сохраняем PID для возможности управления
-        pid_file = APOLLO_DIR / "running.pid"
-        with open(pid_file, "a") as f:
-            f.write(f"{app_name}:{process.pid}\n")
+        _PidLog.record(app_name, process.pid)
         
         return True
         
@@ -257,11 +545,126 @@ def run_exe(path: str, app_name: str, config: Dict[str, Any]) -> bool:
         msg("ERROR", f"Ошибка запуска EXE: {e}")
         return False
 
+def _spawn_detached(argv: list) -> Optional[int]:
+    """Фоновый запуск без ожидания: posix_spawn вместо полного Popen"""
+    executable = _which(argv[0])
+    if executable is None:
+        return None
+
+    if hasattr(os, "posix_spawn"):
+        try:
+            devnull = os.open(os.devnull, os.O_RDWR)
+            try:
+                # vfork-путь ядра: без копирования адресного пространства
+                # и без pipe для отчёта об ошибке exec
+                return os.posix_spawn(
+                    executable, argv, os.environ,
+                    file_actions=[
+                        (os.POSIX_SPAWN_DUP2, devnull, 0),
+                        (os.POSIX_SPAWN_DUP2, devnull, 1),
+                        (os.POSIX_SPAWN_DUP2, devnull, 2),
+                    ]
+                )
+            finally:
+                os.close(devnull)
+        except OSError:
+            pass
+
+    return subprocess.Popen(
+        argv,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    ).pid
+
+def _axml_strings(data: bytes, off: int) -> list:
+    """Разбор пула строк бинарного XML (ResStringPool)"""
+    import struct
+    hsize = struct.unpack_from("<H", data, off + 2)[0]
+    count, _styles, flags, strings_start = struct.unpack_from("<IIII", data, off + 8)
+    utf8 = bool(flags & 0x100)
+    offsets = struct.unpack_from(f"<{count}I", data, off + hsize)
+    base = off + strings_start
+
+    result = []
+    for so in offsets:
+        pos = base + so
+        if utf8:
+            # Две длины (utf16 и utf8), каждая может занимать 1-2 байта
+            if data[pos] & 0x80:
+                pos += 2
+            else:
+                pos += 1
+            length = data[pos]
+            if length & 0x80:
+                length = ((length & 0x7F) << 8) | data[pos + 1]
+                pos += 2
+            else:
+                pos += 1
+            result.append(data[pos:pos + length].decode("utf-8", "replace"))
+        else:
+            length = struct.unpack_from("<H", data, pos)[0]
+            pos += 2
+            if length & 0x8000:
+                length = ((length & 0x7FFF) << 16) | struct.unpack_from("<H", data, pos)[0]
+                pos += 2
+            result.append(data[pos:pos + length * 2].decode("utf-16-le", "replace"))
+
+    return result
+
+def _apk_package_name(path: str) -> Optional[str]:
+    """Имя пакета APK напрямую из AndroidManifest.xml, без aapt"""
+    import struct
+    import zipfile
+
+    try:
+        with zipfile.ZipFile(path) as zf:
+            data = zf.read("AndroidManifest.xml")
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+
+    try:
+        if len(data) < 8 or struct.unpack_from("<H", data, 0)[0] != 0x0003:
+            return None
+
+        strings: list = []
+        off = struct.unpack_from("<H", data, 2)[0]
+        while off + 8 <= len(data):
+            ctype, _hsize = struct.unpack_from("<HH", data, off)
+            csize = struct.unpack_from("<I", data, off + 4)[0]
+            if csize < 8:
+                break
+
+            if ctype == 0x0001 and not strings:  # STRING_POOL
+                strings = _axml_strings(data, off)
+            elif ctype == 0x0102 and strings:  # START_TAG
+                name_idx = struct.unpack_from("<I", data, off + 20)[0]
+                if name_idx < len(strings) and strings[name_idx] == "manifest":
+                    attr_start, _attr_size, attr_count = struct.unpack_from(
+                        "<HHH", data, off + 24)
+                    pos = off + 16 + attr_start
+                    for _ in range(attr_count):
+                        _ns, aname, raw = struct.unpack_from("<III", data, pos)
+                        dtype = data[pos + 15]
+                        value = struct.unpack_from("<I", data, pos + 16)[0]
+                        if aname < len(strings) and strings[aname] == "package":
+                            if raw != 0xFFFFFFFF and raw < len(strings):
+                                return strings[raw]
+                            if dtype == 0x03 and value < len(strings):
+                                return strings[value]
+                        pos += 20
+                    return None
+
+            off += csize
+    except (struct.error, IndexError):
+        pass
+
+    return None
+
 def run_apk(path: str, app_name: str, config: Dict[str, Any]) -> bool:
     """Запуск Android приложения"""
     try:
         # Проверяем Waydroid
-        if shutil.which("waydroid") is None:
+        if _which("waydroid") is None:
             msg("ERROR", "Waydroid не установлен")
             msg("INFO", "Установите: sudo apt install waydroid")
             return False
@@ -275,32 +678,24 @@ def run_apk(path: str, app_name: str, config: Dict[str, Any]) -> bool:
         msg("INFO", f"Установка {app_name}...")
         subprocess.run(["waydroid", "app", "install", path], check=True)
         
-        # Получаем имя пакета
-        result = subprocess.run(
-            ["aapt", "dump", "badging", path],
-            capture_output=True, text=True
-        )
-        
-        package_name = None
-        for line in result.stdout.split('\n'):
-            if line.startswith("package: name="):
-                package_name = line.split("'")[1]
-                break
+        # Получаем имя пакета прямо из манифеста, aapt — запасной вариант
+        package_name = _apk_package_name(path)
+        if package_name is None and _which("aapt"):
+            result = subprocess.run(
+                ["aapt", "dump", "badging", path],
+                capture_output=True, text=True
+            )
+            for line in result.stdout.split('\n'):
+                if line.startswith("package: name="):
+                    package_name = line.split("'")[1]
+                    break
         
         if package_name:
             msg("INFO", f"Запуск пакета {package_name}...")
-            subprocess.Popen(
-                ["waydroid", "app", "launch", package_name],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            _spawn_detached(["waydroid", "app", "launch", package_name])
         else:
             msg("WARNING", "Не удалось определить имя пакета, запускаем оболочку...")
-            subprocess.Popen(
-                ["waydroid", "show-full-ui"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            _spawn_detached(["waydroid", "show-full-ui"])
         
         return True
         
@@ -311,43 +706,76 @@ def run_apk(path: str, app_name: str, config: Dict[str, Any]) -> bool:
 def run_macos(path: str, app_name: str, config: Dict[str, Any]) -> bool:
     """Запуск macOS приложения"""
     try:
-        if shutil.which("darling") is None:
+        if _which("darling") is None:
             msg("ERROR", "Darling не установлен")
             msg("INFO", "Установите: https://darlinghq.org/")
             return False
         
         msg("INFO", f"Запуск {app_name} через Darling...")
-        
+
+        # Упакованные бандлы распаковываем во временную директорию
+        if path.lower().endswith(".app.tar.zst"):
+            extracted = _extract_bundle(path)
+            if not extracted:
+                return False
+            path = extracted
+
         # Для .app директорий
         if path.lower().endswith(".app") and os.path.isdir(path):
             app_path = pathlib.Path(path)
-            # Ищем исполняемый файл
-            for potential_exe in app_path.rglob("Contents/MacOS/*"):
+            macos_dir = app_path / "Contents" / "MacOS"
+
+            # Точное имя бинарника лежит в Info.plist — одно чтение
+            # вместо обхода всего бандла
+            candidates = []
+            try:
+                import plistlib
+                info = plistlib.loads(
+                    (app_path / "Contents" / "Info.plist").read_bytes())
+                executable = info.get("CFBundleExecutable")
+                if executable:
+                    candidates.append(macos_dir / executable)
+            except Exception:
+                # Битый плист (в т.ч. ExpatError от XML-парсера) —
+                # просто уходим на scandir-путь ниже
+                pass
+
+            if not candidates:
+                # Плист отсутствует или битый — смотрим только Contents/MacOS
+                try:
+                    with os.scandir(macos_dir) as it:
+                        candidates = [pathlib.Path(e.path) for e in it
+                                      if e.is_file(follow_symlinks=False)]
+                except OSError:
+                    candidates = []
+
+            for potential_exe in candidates:
                 if os.access(potential_exe, os.X_OK):
-                    subprocess.Popen(
-                        ["darling", "shell", str(potential_exe)],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
+                    _spawn_detached(["darling", "shell", str(potential_exe)])
                     return True
+
+            # Крайний случай: полный обход бандла голыми строками.
+            # Frameworks отсекаем — основной бинарник там не живёт
+            for root, dirs, files in os.walk(path, topdown=True,
+                                             followlinks=False):
+                dirs[:] = [d for d in dirs if d != "Frameworks"]
+                if root.endswith("Contents/MacOS"):
+                    for fname in files:
+                        full = os.path.join(root, fname)
+                        if os.access(full, os.X_OK):
+                            _spawn_detached(["darling", "shell", full])
+                            return True
+            return False
         
         # Для .dmg файлов
         elif path.lower().endswith(".dmg"):
             msg("WARNING", "Монтирование DMG через Darling может потребовать ручной установки")
-            subprocess.Popen(
-                ["darling", "shell", "hdiutil", "attach", path],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            _spawn_detached(["darling", "shell", "hdiutil", "attach", path])
             return True
         
         # Для обычных бинарников
         else:
-            subprocess.Popen(
-                ["darling", "shell", path],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            _spawn_detached(["darling", "shell", path])
             return True
             
     except Exception as e:
@@ -355,11 +783,66 @@ def run_macos(path: str, app_name: str, config: Dict[str, Any]) -> bool:
         return False
 
 #  УПРАВЛЕНИЕ КОНФИГУРАЦИЯМИ э
+def _conf_path(app_name: str) -> pathlib.Path:
+    """Путь к JSON-конфигурации приложения"""
+    return CONF_DIR / f"{app_name}.json"
+
+def _legacy_conf_path(app_name: str) -> pathlib.Path:
+    """Путь к старой .conf-конфигурации (до миграции на JSON)"""
+    return CONF_DIR / f"{app_name}.conf"
+
+def _conf_exists(app_name: str) -> bool:
+    """Есть ли конфигурация приложения (новая или старая)"""
+    return _conf_path(app_name).exists() or _legacy_conf_path(app_name).exists()
+
+def _parse_legacy_conf(conf_file: pathlib.Path) -> Dict[str, Any]:
+    """Разбор старого key=value формата (только для миграции)"""
+    import ast
+
+    config = {}
+    with open(conf_file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                key = key.strip()
+                value = value.strip().strip('"\'')
+
+                # Специальная обработка для словарей и списков:
+                # literal_eval понимает любые кавычки без порчи
+                # апострофов внутри значений
+                if key == "environment" and value.startswith('{'):
+                    try:
+                        config[key] = ast.literal_eval(value)
+                    except (ValueError, SyntaxError):
+                        config[key] = {}
+                elif key == "mounts" and value.startswith('['):
+                    try:
+                        config[key] = ast.literal_eval(value)
+                    except (ValueError, SyntaxError):
+                        config[key] = []
+                else:
+                    config[key] = value
+
+    return config
+
 def load_config(app_name: str) -> Dict[str, Any]:
     """Загрузка конфигурации приложения"""
-    conf_file = CONF_DIR / f"{app_name}.conf"
-    
+    conf_file = _conf_path(app_name)
+
     if not conf_file.exists():
+        # Одноразовая миграция старого .conf в JSON
+        legacy = _legacy_conf_path(app_name)
+        if legacy.exists():
+            try:
+                config = _parse_legacy_conf(legacy)
+            except Exception as e:
+                msg("ERROR", f"Ошибка чтения конфигурации: {e}")
+                return {}
+            if save_config(app_name, config):
+                legacy.unlink(missing_ok=True)
+            return config
+
         # Конфигурация по умолчанию
         return {
             "name": app_name,
@@ -372,32 +855,10 @@ def load_config(app_name: str) -> Dict[str, Any]:
             "working_dir": "",
             "description": ""
         }
-    
+
     try:
-        config = {}
-        with open(conf_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip().strip('"\'')
-                    
-                    # Специальная обработка для словарей и списков
-                    if key == "environment" and value.startswith('{'):
-                        try:
-                            config[key] = json.loads(value.replace("'", '"'))
-                        except:
-                            config[key] = {}
-                    elif key == "mounts" and value.startswith('['):
-                        try:
-                            config[key] = json.loads(value.replace("'", '"'))
-                        except:
-                            config[key] = []
-                    else:
-                        config[key] = value
-        
-        return config
+        # Один C-уровневый json.loads вместо построчного разбора
+        return json.loads(conf_file.read_bytes())
     except Exception as e:
         msg("ERROR", f"Ошибка чтения конфигурации: {e}")
         return {}
@@ -405,44 +866,23 @@ def load_config(app_name: str) -> Dict[str, Any]:
 def save_config(app_name: str, config: Dict[str, Any]) -> bool:
     """Сохранение конфигурации приложения"""
     try:
-        conf_file = CONF_DIR / f"{app_name}.conf"
-        
-        lines = [
-            f'# Конфигурация приложения: {app_name}',
-            f'# Сгенерировано Apollo {VERSION}',
-            '# Измените параметры по необходимости',
-            ''
-        ]
-        
-        # Обязательные поля
-        lines.append(f'name = "{config.get("name", app_name)}"')
-        lines.append(f'type = "{config.get("type", "unknown")}"')
-        lines.append(f'path = "{config.get("path", "")}"')
-        
-        # Опциональные поля
-        if config.get("description"):
-            lines.append(f'description = "{config["description"]}"')
-        
-        if config.get("environment"):
-            env_str = json.dumps(config["environment"], ensure_ascii=False)
-            lines.append(f'environment = {env_str}')
-        
-        if config.get("mounts"):
-            mounts_str = json.dumps(config["mounts"], ensure_ascii=False)
-            lines.append(f'mounts = {mounts_str}')
-        
-        if config.get("network"):
-            lines.append(f'network = "{config["network"]}"')
-        
-        if config.get("arguments"):
-            lines.append(f'arguments = "{config["arguments"]}"')
-        
-        if config.get("working_dir"):
-            lines.append(f'working_dir = "{config["working_dir"]}"')
-        
-        conf_file.write_text('\n'.join(lines))
+        conf_file = _conf_path(app_name)
+        payload = (json.dumps(config, indent=2, ensure_ascii=False) + '\n').encode()
+
+        # Временный файл в той же директории + атомарный rename:
+        # kill -9 посреди записи не оставит битой конфигурации
+        import tempfile
+        tmp = tempfile.NamedTemporaryFile(dir=CONF_DIR, delete=False)
+        try:
+            os.write(tmp.fileno(), payload)
+            tmp.close()
+            os.replace(tmp.name, conf_file)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
         return True
-        
+
     except Exception as e:
         msg("ERROR", f"Ошибка сохранения конфигурации: {e}")
         return False
@@ -590,8 +1030,7 @@ def cmd_conf(app_name: str) -> None:
     """Команда редактирования конфигурации"""
     ensure_dirs()
     
-    conf_file = CONF_DIR / f"{app_name}.conf"
-    if not conf_file.exists():
+    if not _conf_exists(app_name):
         msg("ERROR", f"Приложение '{app_name}' не найдено")
         msg("INFO", f"Сначала добавьте его: apollo add <файл> --name {app_name}")
         return
@@ -612,7 +1051,9 @@ def cmd_conf(app_name: str) -> None:
     elif choice == "2":
         msg("INFO", f"Открываю конфигурацию в {editor}...")
         try:
-            subprocess.run([editor, str(conf_file)], check=True)
+            # Мигрируем старый .conf перед открытием редактора
+            load_config(app_name)
+            subprocess.run([editor, str(_conf_path(app_name))], check=True)
             msg("SUCCESS", "Конфигурация сохранена")
         except subprocess.CalledProcessError as e:
             msg("ERROR", f"Ошибка запуска редактора: {e}")
@@ -630,9 +1071,9 @@ def cmd_open(target: str) -> None:
     # Проверяем, является ли target именем приложения или путем
     if not os.path.exists(target):
         # Пробуем найти приложение по имени
-        conf_file = CONF_DIR / f"{target}.conf"
-        if conf_file.exists():
+        if _conf_exists(target):
             config = load_config(target)
+            original_config = dict(config)
             target_path = config.get("path", "")
             
             if not target_path or not os.path.exists(target_path):
@@ -659,6 +1100,7 @@ def cmd_open(target: str) -> None:
         
         # Загружаем или создаем конфигурацию
         config = load_config(app_name)
+        original_config = dict(config)
         config.update({
             "name": app_name,
             "type": file_type,
@@ -685,8 +1127,10 @@ def cmd_open(target: str) -> None:
     
     if success:
         msg("SUCCESS", f"Приложение '{app_name}' запущено")
-        # Сохраняем обновленную конфигурацию
-        save_config(app_name, config)
+        # Пишем конфигурацию только если она реально изменилась:
+        # горячий путь «запуск по имени» обходится без записи на диск
+        if config != original_config:
+            save_config(app_name, config)
     else:
         msg("ERROR", f"Не удалось запустить '{app_name}'")
 
@@ -714,9 +1158,18 @@ def cmd_add(path: str, name: Optional[str] = None) -> None:
     
     try:
         if os.path.isdir(path):
-            shutil.copytree(path, dest_path, dirs_exist_ok=True)
+            archive = None
+            if path.lower().endswith(".app"):
+                # .app-бандл ужимаем в один tar.zst: один inode вместо тысяч
+                archive = _ingest_bundle(path, app_dir)
+            if archive is not None:
+                dest_path = archive
+            else:
+                import shutil
+                shutil.copytree(path, dest_path, dirs_exist_ok=True,
+                                copy_function=_fast_copyfile)
         else:
-            shutil.copy2(path, dest_path)
+            _fast_copyfile(path, str(dest_path))
     except Exception as e:
         msg("ERROR", f"Ошибка копирования: {e}")
         return
@@ -745,16 +1198,17 @@ def cmd_remove(app_name: str) -> None:
     """Удаление приложения"""
     ensure_dirs()
     
-    conf_file = CONF_DIR / f"{app_name}.conf"
+    conf_file = _conf_path(app_name)
+    legacy_file = _legacy_conf_path(app_name)
     app_dir = APPS_DIR / app_name
-    
-    if not conf_file.exists():
+
+    if not _conf_exists(app_name):
         msg("ERROR", f"Приложение '{app_name}' не найдено")
         return
-    
+
     # Подтверждение
     print(f"{COLORS['RED']}Внимание! Будут удалены:{COLORS['END']}")
-    print(f"  • Конфигурация: {conf_file}")
+    print(f"  • Конфигурация: {conf_file if conf_file.exists() else legacy_file}")
     if app_dir.exists():
         print(f"  • Директория приложения: {app_dir}")
     
@@ -763,7 +1217,9 @@ def cmd_remove(app_name: str) -> None:
     if confirm.lower() == 'y':
         try:
             conf_file.unlink(missing_ok=True)
+            legacy_file.unlink(missing_ok=True)
             if app_dir.exists():
+                import shutil
                 shutil.rmtree(app_dir)
             msg("SUCCESS", f"Приложение '{app_name}' удалено")
         except Exception as e:
@@ -775,29 +1231,64 @@ def cmd_list() -> None:
     """Список установленных приложений"""
     ensure_dirs()
     
-    configs = list(CONF_DIR.glob("*.conf"))
-    
-    if not configs:
+    # os.scandir вместо glob: без Path-объекта и лишнего stat на запись
+    names = set()
+    with os.scandir(CONF_DIR) as it:
+        for entry in it:
+            if entry.name.endswith((".json", ".conf")):
+                names.add(entry.name.rsplit('.', 1)[0])
+
+    if not names:
         msg("INFO", "Нет установленных приложений")
         return
-    
+
+    # Файлы приложений почти всегда лежат под APPS_DIR: держим один
+    # открытый dirfd, чтобы ядро не разрешало весь путь на каждый stat
+    apps_root = str(APPS_DIR) + os.sep
+    try:
+        apps_fd = os.open(APPS_DIR, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        apps_fd = None
+
+    def _path_exists(path: str) -> bool:
+        if apps_fd is not None and path.startswith(apps_root):
+            try:
+                os.stat(path[len(apps_root):], dir_fd=apps_fd)
+                return True
+            except OSError:
+                return False
+        return os.path.exists(path)
+
+    def _probe(app_name: str):
+        config = load_config(app_name)
+        exists = bool(config.get("path")) and _path_exists(config["path"])
+        return app_name, config, exists
+
+    # Читаем и stat-им конфигурации параллельно, рендерим после
+    import concurrent.futures
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(32, len(names))) as pool:
+            rows = list(pool.map(_probe, names))
+    finally:
+        if apps_fd is not None:
+            os.close(apps_fd)
+    rows.sort(key=lambda row: row[0])
+
     print(f"{COLORS['BOLD']}Установленные приложения:{COLORS['END']}")
     print(f"{'-'*50}")
-    
-    for conf_file in sorted(configs):
-        app_name = conf_file.stem
-        config = load_config(app_name)
-        
-        status = f"{COLORS['GREEN']}✓{COLORS['END']}" if config.get("path") and os.path.exists(config["path"]) else f"{COLORS['RED']}✗{COLORS['END']}"
+
+    for app_name, config, exists in rows:
+        status = f"{COLORS['GREEN']}✓{COLORS['END']}" if exists else f"{COLORS['RED']}✗{COLORS['END']}"
         app_type = config.get("type", "unknown")
         desc = config.get("description", "")[:50]
-        
+
         print(f"{status} {COLORS['CYAN']}{app_name:<20}{COLORS['END']} "
               f"{COLORS['YELLOW']}{app_type:<10}{COLORS['END']} "
               f"{desc}")
-    
+
     print(f"{'-'*50}")
-    msg("INFO", f"Всего приложений: {len(configs)}")
+    msg("INFO", f"Всего приложений: {len(rows)}")
 
 def cmd_info(app_name: Optional[str] = None) -> None:
     """Информация о системе или приложении"""
@@ -816,15 +1307,17 @@ def cmd_info(app_name: Optional[str] = None) -> None:
         print(f"{COLORS['CYAN']}Зависимости:{COLORS['END']}")
         for cmd, name in [("lxc", "LXC"), ("wine", "Wine"), 
                          ("darling", "Darling"), ("waydroid", "Waydroid")]:
-            status = f"{COLORS['GREEN']}✓{COLORS['END']}" if shutil.which(cmd) else f"{COLORS['RED']}✗{COLORS['END']}"
+            status = f"{COLORS['GREEN']}✓{COLORS['END']}" if _which(cmd) else f"{COLORS['RED']}✗{COLORS['END']}"
             print(f"  {status} {name}")
         print()
         
         # Статистика
-        configs = list(CONF_DIR.glob("*.conf"))
+        names = ({f.stem for f in CONF_DIR.glob("*.json")} |
+                 {f.stem for f in CONF_DIR.glob("*.conf")})
         print(f"{COLORS['CYAN']}Статистика:{COLORS['END']}")
-        print(f"  Установлено приложений: {len(configs)}")
-        print(f"  Контейнер Apollo: {'запущен' if subsystem_running() else 'остановлен'}")
+        print(f"  Установлено приложений: {len(names)}")
+        # Информационная команда показывает свежий статус, минуя кэш
+        print(f"  Контейнер Apollo: {'запущен' if subsystem_running(force=True) else 'остановлен'}")
         
     else:
         # Информация о приложении
@@ -859,116 +1352,258 @@ def cmd_info(app_name: Optional[str] = None) -> None:
         else:
             msg("WARNING", f"Файл не найден: {path}")
 
-def cmd_clean() -> None:
+# Логи именуются <app>_<unix-ts>.log — возраст виден прямо из имени,
+# без stat (разбор строки ~100нс против 1-5мкс на syscall)
+_LOG_TS_RE = re.compile(r"_(\d{9,12})\.log$")
+
+def _safe_unlink(path: str, dir_fd: Optional[int] = None) -> int:
+    """Удаление файла: 1 при успехе, 0 при ошибке"""
+    # Типичный случай (файл есть и удаляем) не заходит в обработчик
+    # вовсе; исчезнувший из-под нас файл — самая дешёвая из ошибок
+    try:
+        os.unlink(path, dir_fd=dir_fd)
+        return 1
+    except FileNotFoundError:
+        return 0
+    except OSError:
+        return 0
+
+def cmd_clean(days: int = 7) -> None:
     """Очистка временных файлов и логов"""
     ensure_dirs()
-    
-    # Удаляем старые логи (старше 7 дней)
+
+    # Один проход scandir по открытому fd каталога: порог посчитан до
+    # цикла, возраст по возможности берётся из имени файла без stat,
+    # размер выживших копится тем же проходом
+    cutoff = time.time() - days * 86400.0
+    ts_search = _LOG_TS_RE.search
+    total_size = 0
+    victims = []
+    keep_names = []
+    bulk_ok = True
     deleted_logs = 0
-    for log_file in LOG_DIR.glob("*.log"):
-        if log_file.stat().st_mtime < time.time() - 7 * 86400:
-            try:
-                log_file.unlink()
-                deleted_logs += 1
-            except:
-                pass
+    dfd = os.open(LOG_DIR_STR, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        with os.scandir(dfd) as it:
+            for entry in it:
+                if not entry.is_file(follow_symlinks=False):
+                    # Вложенные каталоги нельзя унести bulk-переносом
+                    bulk_ok = False
+                    continue
+
+                # Быстрый путь: метка времени в имени выдаёт устаревший
+                # лог без обращения к stat
+                ts_match = ts_search(entry.name)
+                if ts_match is not None and int(ts_match.group(1)) < cutoff:
+                    victims.append(entry.name)
+                    continue
+
+                st = entry.stat()
+                if entry.name.endswith(".log") and st.st_mtime < cutoff:
+                    victims.append(entry.name)
+                else:
+                    keep_names.append(entry.name)
+                    total_size += st.st_size
+
+        total = len(victims) + len(keep_names)
+        if bulk_ok and victims and len(victims) / total > 0.8:
+            # Почти всё устарело: дешевле унести каталог целиком,
+            # вернуть немногих выживших и удалять старое дерево в фоне
+            import shutil
+            import threading
+
+            old_dir = LOG_DIR.with_suffix(".old")
+            if old_dir.exists():
+                shutil.rmtree(old_dir, ignore_errors=True)
+            os.rename(LOG_DIR, old_dir)
+            LOG_DIR.mkdir()
+            for name in keep_names:
+                try:
+                    os.rename(old_dir / name, LOG_DIR / name)
+                except OSError:
+                    pass
+            threading.Thread(
+                target=shutil.rmtree,
+                args=(old_dir,),
+                kwargs={"ignore_errors": True}
+            ).start()
+            deleted_logs = len(victims)
+        elif victims:
+            # unlink отпускает GIL — удаляем пачкой в несколько потоков
+            import concurrent.futures
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+                deleted_logs = sum(pool.map(
+                    functools.partial(_safe_unlink, dir_fd=dfd), victims))
+    finally:
+        os.close(dfd)
     
-    # Очищаем PID файл
-    pid_file = APOLLO_DIR / "running.pid"
-    if pid_file.exists():
-        pid_file.unlink(missing_ok=True)
+    # Очищаем PID файл: missing_ok уже покрывает ENOENT,
+    # предварительный exists() был лишним stat-ом
+    (APOLLO_DIR / "running.pid").unlink(missing_ok=True)
     
-    msg("SUCCESS", f"Очищено логов: {deleted_logs}")
-    msg("INFO", f"Размер директории логов: {sum(f.stat().st_size for f in LOG_DIR.glob('*') if f.is_file()):,} байт")
+    msg_many([
+        ("SUCCESS", f"Очищено логов: {deleted_logs}"),
+        ("INFO", f"Размер директории логов: {total_size:,} байт")
+    ])
+
+#  ГЛАВНАЯ ФУНКЦИЯ
+# Заголовки справки свёрнуты в константы при импорте: никаких
+# словарных lookup-ов и f-string-ов на каждый вызов help
+_HELP_TITLE = f"{COLORS['BOLD']}Apollo v{VERSION} - Мультиплатформенный лаунчер{COLORS['END']}"
+_HELP_USAGE_HDR = f"{COLORS['CYAN']}Использование:{COLORS['END']}"
+_HELP_CMDS_HDR = f"{COLORS['CYAN']}Команды:{COLORS['END']}"
+_HELP_EXAMPLES_HDR = f"{COLORS['CYAN']}Примеры:{COLORS['END']}"
+
+# Вся справка — одна заранее собранная строка: один write()
+# вместо ~20 print() с захватом блокировки stdout на каждый
+_HELP = "\n".join((
+    _HELP_TITLE,
+    "",
+    _HELP_USAGE_HDR,
+    "  apollo <команда> [аргументы]",
+    "",
+    _HELP_CMDS_HDR,
+    "  open <файл/имя>      Запустить приложение",
+    "  add <файл> [--name]  Добавить новое приложение",
+    "  list                 Список установленных приложений",
+    "  conf <имя>           Редактировать конфигурацию приложения",
+    "  remove <имя>         Удалить приложение",
+    "  info [имя]           Информация о системе или приложении",
+    "  clean [--days N]     Очистка логов и временных файлов",
+    "  help                 Показать эту справку",
+    "",
+    _HELP_EXAMPLES_HDR,
+    "  apollo add program.exe --name MyApp",
+    "  apollo conf MyApp",
+    "  apollo open MyApp",
+    "  apollo open /path/to/game.exe",
+    "",
+    "",
+))
 
-#  ГЛАВНАЯ ФУНКЦИЯ 
 def print_help() -> None:
     """Вывод справки"""
-    print(f"{COLORS['BOLD']}Apollo v{VERSION} - Мультиплатформенный лаунчер{COLORS['END']}")
-    print()
-    print(f"{COLORS['CYAN']}Использование:{COLORS['END']}")
-    print("  apollo <команда> [аргументы]")
-    print()
-    print(f"{COLORS['CYAN']}Команды:{COLORS['END']}")
-    print("  open <файл/имя>      Запустить приложение")
-    print("  add <файл> [--name]  Добавить новое приложение")
-    print("  list                 Список установленных приложений")
-    print("  conf <имя>           Редактировать конфигурацию приложения")
-    print("  remove <имя>         Удалить приложение")
-    print("  info [имя]           Информация о системе или приложении")
-    print("  clean                Очистка логов и временных файлов")
-    print("  help                 Показать эту справку")
-    print()
-    print(f"{COLORS['CYAN']}Примеры:{COLORS['END']}")
-    print("  apollo add program.exe --name MyApp")
-    print("  apollo conf MyApp")
-    print("  apollo open MyApp")
-    print("  apollo open /path/to/game.exe")
-    print()
+    sys.stdout.write(_HELP)
+
+def _parse_argv(argv: list):
+    """Один проход по argv: (команда, позиционные, опции --ключ значение)"""
+    if len(argv) < 2:
+        return None, [], {}
+
+    command = argv[1]
+    positional = []
+    options = {}
+    i = 2
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith("--") and len(arg) > 2:
+            if i + 1 < len(argv):
+                options[arg[2:]] = argv[i + 1]
+                i += 2
+            else:
+                options[arg[2:]] = ""
+                i += 1
+        else:
+            positional.append(arg)
+            i += 1
+
+    return command, positional, options
+
+def _do_open(pos: list, opts: dict) -> None:
+    if not pos:
+        msg("ERROR", "Укажите файл или имя приложения")
+        print_help()
+    else:
+        cmd_open(pos[0])
+
+def _do_add(pos: list, opts: dict) -> None:
+    if not pos:
+        msg("ERROR", "Укажите путь к файлу")
+        print_help()
+    else:
+        cmd_add(pos[0], opts.get("name"))
+
+def _do_conf(pos: list, opts: dict) -> None:
+    if not pos:
+        msg("ERROR", "Укажите имя приложения")
+        cmd_list()
+    else:
+        cmd_conf(pos[0])
+
+def _do_remove(pos: list, opts: dict) -> None:
+    if not pos:
+        msg("ERROR", "Укажите имя приложения")
+        cmd_list()
+    else:
+        cmd_remove(pos[0])
+
+def _do_info(pos: list, opts: dict) -> None:
+    cmd_info(pos[0] if pos else None)
+
+def _do_list(pos: list, opts: dict) -> None:
+    cmd_list()
+
+def _do_clean(pos: list, opts: dict) -> None:
+    days = opts.get("days")
+    if days is None:
+        cmd_clean()
+        return
+    try:
+        days = int(days)
+    except ValueError:
+        msg("ERROR", f"Неверное значение --days: {days}")
+        return
+    cmd_clean(days=days)
+
+def _do_help(pos: list, opts: dict) -> None:
+    print_help()
+
+def _print_version(pos: list, opts: dict) -> None:
+    print(f"Apollo v{VERSION}")
+
+# Ключи интернированы: после sys.intern(команды) поиск в словаре —
+# это сравнение указателей, без посимвольного memcmp
+_DISPATCH = {sys.intern(cmd): handler for cmd, handler in {
+    "open": _do_open,
+    "add": _do_add,
+    "list": _do_list,
+    "conf": _do_conf,
+    "remove": _do_remove,
+    "info": _do_info,
+    "clean": _do_clean,
+    "help": _do_help,
+    "--help": _do_help,
+    "-h": _do_help,
+    "version": _print_version,
+    "--version": _print_version,
+    "-v": _print_version,
+}.items()}
 
 def main() -> None:
     """Главная функция"""
-    ensure_dirs()
-    
-    if len(sys.argv) < 2:
+    command, positional, options = _parse_argv(sys.argv)
+
+    if command is None:
         print_help()
         return
-    
-    command = sys.argv[1]
-    
+
+    handler = _DISPATCH.get(sys.intern(command))
+
+    # Чисто информационные команды не трогают ~/.apollo — им не нужна
+    # mkdir-серия из ensure_dirs
+    if handler in (_do_help, _print_version):
+        handler(positional, options)
+        return
+
+    ensure_dirs()
+
     try:
-        if command == "open":
-            if len(sys.argv) < 3:
-                msg("ERROR", "Укажите файл или имя приложения")
-                print_help()
-            else:
-                cmd_open(sys.argv[2])
-        
-        elif command == "add":
-            if len(sys.argv) < 3:
-                msg("ERROR", "Укажите путь к файлу")
-                print_help()
-            else:
-                name = None
-                if "--name" in sys.argv:
-                    name_index = sys.argv.index("--name") + 1
-                    if name_index < len(sys.argv):
-                        name = sys.argv[name_index]
-                cmd_add(sys.argv[2], name)
-        
-        elif command == "list":
-            cmd_list()
-        
-        elif command == "conf":
-            if len(sys.argv) < 3:
-                msg("ERROR", "Укажите имя приложения")
-                cmd_list()
-            else:
-                cmd_conf(sys.argv[2])
-        
-        elif command == "remove":
-            if len(sys.argv) < 3:
-                msg("ERROR", "Укажите имя приложения")
-                cmd_list()
-            else:
-                cmd_remove(sys.argv[2])
-        
-        elif command == "info":
-            cmd_info(sys.argv[2] if len(sys.argv) > 2 else None)
-        
-        elif command == "clean":
-            cmd_clean()
-        
-        elif command in ["help", "--help", "-h"]:
-            print_help()
-        
-        elif command in ["version", "--version", "-v"]:
-            print(f"Apollo v{VERSION}")
-        
-        else:
+        if handler is None:
             msg("ERROR", f"Неизвестная команда: {command}")
             print_help()
-    
+        else:
+            handler(positional, options)
+
     except KeyboardInterrupt:
         msg("INFO", "Прервано пользователем")
         sys.exit(0)